@@ -1,12 +1,18 @@
+import hashlib
 import json
+import math
+import os
+import threading
 import uuid
 from pathlib import Path
 from collections.abc import Mapping
 from typing import NotRequired, TypedDict, cast
 
 
-import pandas as pd
-
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
 
 from reward_system.reward_logic import (
     DEFAULT_REWARD_TABLE,
@@ -20,6 +26,14 @@ from reward_system.reward_logic import (
 
 
 
+# 默认梯度表的 records 形式只需在导入时转换一次；各调用点只整体替换 table，不会原地修改其中的行
+_DEFAULT_REWARD_RECORDS: list[dict[str, object]] = cast(
+    list[dict[str, object]], DEFAULT_REWARD_TABLE.to_dict(orient="records")
+)
+
+
+
+
 class RuleVersion(TypedDict):
     id: str
     name: str
@@ -50,22 +64,100 @@ class Activity(TypedDict):
 DATA_DIR = Path(__file__).resolve().parent / "data"
 ACTIVITIES_FILE = DATA_DIR / "activities.json"
 
+# 进程内缓存：(文件 mtime_ns, 已解析的活动列表)；文件未变化时直接复用，避免每次重复读盘解析
+_CACHE: tuple[int, list[Activity]] | None = None
+# (被索引的活动列表, 活动 id -> 活动)；索引与列表绑定，列表换了（重新读取或写入）即重建
+_INDEX: tuple[list[Activity], dict[str, Activity]] | None = None
+# 本进程最近一次写盘的 (文件 mtime_ns, 内容摘要)；内容与磁盘一致时跳过重复写入
+_LAST_WRITTEN: tuple[int, bytes] | None = None
+
+# 数据结构版本（含奖励规则版本）；任一版本变化都会触发一次兼容迁移
+_SCHEMA_VERSION = f"1/{REWARD_VERSION}"
+# 迁移标记文件：记录“结构版本 + 已迁移文件内容摘要”。activities.json 仍保持列表格式，
+# 旧版本程序可照常读写；文件内容被其他程序改动后摘要不再匹配，会重新迁移一次
+SCHEMA_STAMP_FILE = DATA_DIR / ".activities_schema"
+
 
 def _ensure_data_dir() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _write_atomic(path: Path, payload: bytes) -> None:
+    # 先完整写入同目录临时文件再替换，避免写到一半崩溃留下截断的 JSON
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_bytes(payload)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _digest(payload: bytes) -> bytes:
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _schema_stamp(digest: bytes) -> str:
+    return f"{_SCHEMA_VERSION} {digest.hex()}"
+
+
+def _read_schema_stamp() -> str | None:
+    try:
+        return SCHEMA_STAMP_FILE.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+
+def _write_schema_stamp(digest: bytes) -> None:
+    try:
+        _write_atomic(SCHEMA_STAMP_FILE, _schema_stamp(digest).encode("utf-8"))
+    except OSError:
+        # 标记只用于跳过迁移，写不进去时下次读取重新迁移即可
+        pass
+
+
+def _has_non_finite(obj: object) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(v) for v in obj.values())
+    if isinstance(obj, list):
+        return any(_has_non_finite(v) for v in obj)
+    return False
+
+
+def _loads(raw: bytes) -> object:
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # 旧文件可能含 NaN（数据编辑器新增空行），orjson 不支持，交给标准库解析
+            pass
+    return json.loads(raw)
+
+
+def _dumps(obj: object) -> bytes:
+    # orjson 会把 NaN/Infinity 写成 null，为保持落盘格式一致，此时仍用标准库
+    if orjson is not None and not _has_non_finite(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+_DEFAULT_RULE_PROTO: RuleVersion = {
+    "id": "rule_default",
+    "name": "默认规则",
+    "version": REWARD_VERSION,
+    "table": _DEFAULT_REWARD_RECORDS,
+    "quality_rules": DEFAULT_QUALITY_RULES,
+    "time_rules": DEFAULT_TIME_RULES,
+    "base_mode": DEFAULT_BASE_MODE,
+    "base_params": DEFAULT_BASE_PARAMS,
+}
+
+
 def _default_rule() -> RuleVersion:
-    return {
-        "id": "rule_default",
-        "name": "默认规则",
-        "version": REWARD_VERSION,
-        "table": cast(list[dict[str, object]], DEFAULT_REWARD_TABLE.to_dict(orient="records")),
-        "quality_rules": cast(list[dict[str, object]], DEFAULT_QUALITY_RULES),
-        "time_rules": cast(list[dict[str, object]], DEFAULT_TIME_RULES),
-        "base_mode": DEFAULT_BASE_MODE,
-        "base_params": cast(dict[str, object], DEFAULT_BASE_PARAMS),
-    }
+    # 浅拷贝：调用方只会整体替换顶层字段，内部列表/字典与默认值共享
+    return {**_DEFAULT_RULE_PROTO}
 
 
 
@@ -88,31 +180,36 @@ def _default_activity() -> Activity:
 def ensure_activities_file() -> None:
     _ensure_data_dir()
     if not ACTIVITIES_FILE.exists():
-        with ACTIVITIES_FILE.open("w", encoding="utf-8") as f:
-            json.dump([_default_activity()], f, ensure_ascii=False, indent=2)
+        save_activities([_default_activity()])
 
 
 def _normalize_rule_versions(rules: object) -> list[RuleVersion]:
     result: list[RuleVersion] = []
     if not isinstance(rules, list):
         return [_default_rule()]
+    # 循环内反复引用的全局名先绑定为局部变量，省去每次迭代的全局查找
+    str_ = str
+    cast_ = cast
+    reward_version = REWARD_VERSION
+    default_table = _DEFAULT_REWARD_RECORDS
+    default_quality = DEFAULT_QUALITY_RULES
+    default_time = DEFAULT_TIME_RULES
+    default_mode = DEFAULT_BASE_MODE
+    default_params = DEFAULT_BASE_PARAMS
+    append = result.append
     for item in rules:
         if isinstance(item, dict):
-            result.append(
+            get = item.get
+            append(
                 {
-                    "id": str(item.get("id", "rule_default")),
-                    "name": str(item.get("name", "默认规则")),
-                    "version": str(item.get("version", REWARD_VERSION)),
-                    "table": cast(
-                        list[dict[str, object]],
-                        item.get("table") or DEFAULT_REWARD_TABLE.to_dict(orient="records"),
-                    ),
-                    "quality_rules": cast(
-                        list[dict[str, object]], item.get("quality_rules") or DEFAULT_QUALITY_RULES
-                    ),
-                    "time_rules": cast(list[dict[str, object]], item.get("time_rules") or DEFAULT_TIME_RULES),
-                    "base_mode": str(item.get("base_mode", DEFAULT_BASE_MODE)),
-                    "base_params": cast(dict[str, object], item.get("base_params", DEFAULT_BASE_PARAMS)),
+                    "id": str_(get("id", "rule_default")),
+                    "name": str_(get("name", "默认规则")),
+                    "version": str_(get("version", reward_version)),
+                    "table": cast_(list[dict[str, object]], get("table") or default_table),
+                    "quality_rules": cast_(list[dict[str, object]], get("quality_rules") or default_quality),
+                    "time_rules": cast_(list[dict[str, object]], get("time_rules") or default_time),
+                    "base_mode": str_(get("base_mode", default_mode)),
+                    "base_params": cast_(dict[str, object], get("base_params", default_params)),
                 }
             )
 
@@ -121,18 +218,37 @@ def _normalize_rule_versions(rules: object) -> list[RuleVersion]:
 
 
 def load_activities() -> list[Activity]:
-    ensure_activities_file()
-    with ACTIVITIES_FILE.open("r", encoding="utf-8") as f:
-        raw_data = json.load(f)
-    data: list[Activity] = raw_data if isinstance(raw_data, list) else []
+    """读取活动列表。
+
+    结果按文件 mtime 缓存，返回的列表与缓存共享，各会话线程共用，调用方应视为只读；
+    需要修改时复制后通过 save_activities 写回。
+    """
+    global _CACHE
+    try:
+        mtime_ns = ACTIVITIES_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        ensure_activities_file()
+        mtime_ns = ACTIVITIES_FILE.stat().st_mtime_ns
+    if _CACHE is not None and _CACHE[0] == mtime_ns:
+        return _CACHE[1]
+
+    raw = ACTIVITIES_FILE.read_bytes()
+    digest = _digest(raw)
+    raw_data = _loads(raw)
+    if isinstance(raw_data, list) and raw_data and _read_schema_stamp() == _schema_stamp(digest):
+        # 文件内容已按当前版本迁移过，跳过兼容迁移
+        _CACHE = (mtime_ns, cast(list[Activity], raw_data))
+        return _CACHE[1]
+
+    changed = False
+    data: list[Activity] = cast(list[Activity], raw_data) if isinstance(raw_data, list) else []
     if not data:
         data = [_default_activity()]
 
-    changed = False
     for act in data:
         rules = _normalize_rule_versions(act.get("rule_versions"))
         if rules and rules[0].get("version") != REWARD_VERSION:
-            rules[0]["table"] = cast(list[dict[str, object]], DEFAULT_REWARD_TABLE.to_dict(orient="records"))
+            rules[0]["table"] = _DEFAULT_REWARD_RECORDS
             rules[0]["quality_rules"] = cast(list[dict[str, object]], DEFAULT_QUALITY_RULES)
             rules[0]["time_rules"] = cast(list[dict[str, object]], DEFAULT_TIME_RULES)
             rules[0]["base_mode"] = DEFAULT_BASE_MODE
@@ -155,19 +271,58 @@ def load_activities() -> list[Activity]:
                 changed = True
         act["rule_versions"] = rules
 
-
     if changed:
+        # save_activities 会同时更新迁移标记
         save_activities(data)
+    else:
+        # 内容无需改动则不重写数据文件，只记下迁移标记，之后的读取直接走快速路径
+        _write_schema_stamp(digest)
+        _CACHE = (mtime_ns, data)
     return data
 
 
 
 
 def save_activities(activities: list[Activity]) -> None:
-
+    global _CACHE, _LAST_WRITTEN
     _ensure_data_dir()
-    with ACTIVITIES_FILE.open("w", encoding="utf-8") as f:
-        json.dump(activities, f, ensure_ascii=False, indent=2)
+    payload = _dumps(activities)
+    digest = _digest(payload)
+    if _LAST_WRITTEN is not None and _LAST_WRITTEN[1] == digest:
+        try:
+            unchanged_on_disk = ACTIVITIES_FILE.stat().st_mtime_ns == _LAST_WRITTEN[0]
+        except OSError:
+            unchanged_on_disk = False
+        # 磁盘上仍是上次写入的内容（未被外部修改），无需重写
+        if unchanged_on_disk:
+            _CACHE = (_LAST_WRITTEN[0], activities)
+            return
+    _write_atomic(ACTIVITIES_FILE, payload)
+    # 写入的数据均已是当前结构版本
+    _write_schema_stamp(digest)
+    # 用刚写入的数据刷新缓存，下次读取无需重新解析
+    mtime_ns = ACTIVITIES_FILE.stat().st_mtime_ns
+    _LAST_WRITTEN = (mtime_ns, digest)
+    _CACHE = (mtime_ns, activities)
+
+
+def _activity_index(activities: list[Activity]) -> dict[str, Activity]:
+    """返回给定活动列表的 id 索引；调用方应在同一个列表上查找和写回。"""
+    global _INDEX
+    cached = _INDEX
+    if cached is not None and cached[0] is activities:
+        return cached[1]
+    index: dict[str, Activity] = {}
+    for act in activities:
+        # 与线性查找保持一致：重复 id 时取第一个
+        index.setdefault(str(act.get("id")), act)
+    _INDEX = (activities, index)
+    return index
+
+
+def _replace_activity(activities: list[Activity], old: Activity, new: Activity) -> list[Activity]:
+    # 返回替换后的新列表，不改动缓存中的原列表
+    return [new if act is old else act for act in activities]
 
 
 def add_activity(payload: Mapping[str, str]) -> Activity:
@@ -183,15 +338,15 @@ def add_activity(payload: Mapping[str, str]) -> Activity:
         "rule_versions": [_default_rule()],
     }
 
-    activities.append(new_activity)
-    save_activities(activities)
+    # 在列表副本上追加，写盘成功后缓存才会指向新列表
+    save_activities([*activities, new_activity])
     return new_activity
 
 
 
 def update_activity_rule(
     activity_id: str,
-    table_df: pd.DataFrame,
+    table_records: list[dict[str, object]],
     quality_rules: list[dict[str, object]] | None = None,
     time_rules: list[dict[str, object]] | None = None,
     base_mode: str | None = None,
@@ -199,50 +354,58 @@ def update_activity_rule(
 ) -> None:
 
     activities = load_activities()
-    for act in activities:
-        if act.get("id") == activity_id:
-            rules = act.get("rule_versions") or [_default_rule()]
-            table_records = cast(list[dict[str, object]], table_df.to_dict(orient="records"))
-            rules[0]["table"] = table_records
-            if quality_rules is not None:
-                rules[0]["quality_rules"] = cast(list[dict[str, object]], quality_rules)
-            if time_rules is not None:
-                rules[0]["time_rules"] = cast(list[dict[str, object]], time_rules)
-            if base_mode is not None:
-                rules[0]["base_mode"] = base_mode
-            if base_params is not None:
-                rules[0]["base_params"] = base_params
-            act["rule_versions"] = cast(list[RuleVersion], rules)
-            break
-    save_activities(activities)
+    act = _activity_index(activities).get(activity_id)
+    if act is None:
+        return
+    # 缓存中的对象各会话共享，修改在副本上进行，写盘成功后才替换进缓存
+    rules = list(act.get("rule_versions") or [_default_rule()])
+    rule: RuleVersion = {**rules[0], "table": table_records}
+    if quality_rules is not None:
+        rule["quality_rules"] = cast(list[dict[str, object]], quality_rules)
+    if time_rules is not None:
+        rule["time_rules"] = cast(list[dict[str, object]], time_rules)
+    if base_mode is not None:
+        rule["base_mode"] = base_mode
+    if base_params is not None:
+        rule["base_params"] = base_params
+    rules[0] = rule
+    updated: Activity = {**act, "rule_versions": rules}
+    save_activities(_replace_activity(activities, act, updated))
 
 
 
 
 
-def update_activity_meta(activity_id: str, payload: Mapping[str, str]) -> None:
+_META_FIELDS = ("name", "period", "start_date", "end_date", "status", "remark")
+
+
+def update_activity_meta(activity_id: str, payload: Mapping[str, str]) -> bool:
+    """更新活动基础信息，返回是否有变化；未变化时不写盘。"""
     activities = load_activities()
-    for act in activities:
-        if act.get("id") == activity_id:
-            act["name"] = payload.get("name", act.get("name", ""))
-            act["period"] = payload.get("period", act.get("period", ""))
-            act["start_date"] = payload.get("start_date", act.get("start_date", ""))
-            act["end_date"] = payload.get("end_date", act.get("end_date", ""))
-            act["status"] = payload.get("status", act.get("status", ""))
-            act["remark"] = payload.get("remark", act.get("remark", ""))
-            if not act.get("rule_versions"):
-                act["rule_versions"] = [_default_rule()]
-            break
-    save_activities(activities)
+    act = _activity_index(activities).get(activity_id)
+    if act is None:
+        return False
+    # 在副本上比较和修改，写盘成功后才替换进缓存
+    updated: Activity = {**act}
+    fields = cast(dict[str, object], updated)
+    changed = False
+    for field in _META_FIELDS:
+        value = payload.get(field, fields.get(field, ""))
+        if field not in fields or fields[field] != value:
+            fields[field] = value
+            changed = True
+    if not updated.get("rule_versions"):
+        updated["rule_versions"] = [_default_rule()]
+        changed = True
+    if changed:
+        save_activities(_replace_activity(activities, act, updated))
+    return changed
 
 
 
 def get_activity_by_id(activity_id: str) -> Activity | None:
 
-    for act in load_activities():
-        if act.get("id") == activity_id:
-            return act
-    return None
+    return _activity_index(load_activities()).get(activity_id)
 
 
 def delete_activity(activity_id: str) -> None:
@@ -251,9 +414,9 @@ def delete_activity(activity_id: str) -> None:
     # 至少保留 1 个活动，避免空列表导致界面无法使用
     if len(activities) <= 1:
         raise ValueError("至少保留一个活动，无法删除最后一个活动")
-    filtered = [act for act in activities if act.get("id") != activity_id]
     # 若未找到匹配则不写回
-    if len(filtered) == len(activities):
+    if activity_id not in _activity_index(activities):
         return
+    filtered = [act for act in activities if act.get("id") != activity_id]
     save_activities(filtered)
 
@@ -1,7 +1,8 @@
 import io
+import json
 import tempfile
-import csv
 import datetime
+from functools import partial
 from pathlib import Path
 
 import pandas as pd
@@ -27,14 +28,20 @@ except Exception:  # pragma: no cover
 
 
 
-HAS_CALAMINE = False  # calamine 非必需；如需更强兼容可自行安装
+try:
+    importlib.import_module("python_calamine")
+    HAS_CALAMINE = True
+except Exception:  # pragma: no cover
+    HAS_CALAMINE = False  # calamine 非必需；未安装时回退到 openpyxl  # pyright: ignore[reportConstantRedefinition]
 
 from reward_system.reward_logic import (
+    CSV_ENGINE,
     DEFAULT_REWARD_TABLE,  # pyright: ignore[reportUnknownVariableType]
     DEFAULT_QUALITY_RULES,
     DEFAULT_TIME_RULES,
     build_download_buffer,  # pyright: ignore[reportUnknownVariableType]
     compute_rewards,  # pyright: ignore[reportUnknownVariableType]
+    df_to_records,
     load_sample_data,  # pyright: ignore[reportUnknownVariableType]
 )
 
@@ -92,30 +99,38 @@ def show_friendly_excel_error(message: str | None = None) -> None:
 
 
 
-def read_excel_with_fallback(file_bytes: bytes) -> pd.DataFrame | None:  # pyright: ignore[reportUnknownParameterType, reportUnknownMemberType]
-    # 优先 openpyxl（含样式时可能报 Fill 相关错误）
+def read_excel_with_fallback(file: io.BytesIO) -> pd.DataFrame | None:  # pyright: ignore[reportUnknownParameterType, reportUnknownMemberType]
+    # 优先 calamine（Rust 实现，只读取值、不解析样式，速度快且不受 Fill 等样式错误影响）
+    # 各引擎直接读取同一个上传缓冲区，每次尝试前回到开头，避免复制整份文件字节
+    if HAS_CALAMINE:
+        try:
+            file.seek(0)
+            return cast(pd.DataFrame, pd.read_excel(file, engine="calamine"))  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+        except Exception:  # noqa: BLE001
+            pass
+    # 其次 openpyxl（含样式时可能报 Fill 相关错误）
     try:
-        return cast(pd.DataFrame, pd.read_excel(io.BytesIO(file_bytes), engine="openpyxl"))  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+        file.seek(0)
+        return cast(pd.DataFrame, pd.read_excel(file, engine="openpyxl"))  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
 
     except Exception as exc_primary:  # noqa: BLE001
         msg = str(exc_primary).lower()
         if "fill" in msg or "openpyxl" in msg:
             st.info("检测到样式问题，正在尝试自动转换为 CSV 再读取……")  # pyright: ignore[reportUnusedCallResult, reportUnnecessaryTypeIgnoreComment]
-        # 其次使用 xlsx2csv 仅读取值，不解析样式，兼容腾讯文档导出
+        # 再次使用 xlsx2csv 仅读取值，不解析样式，兼容腾讯文档导出
         try:
             if not HAS_XLSX2CSV:
                 raise RuntimeError("未安装 xlsx2csv，跳过自动转换。")
             with tempfile.NamedTemporaryFile(delete=False, suffix=".csv", newline="") as tmp:
                 tmp_path = tmp.name
-                Xlsx2csv(io.BytesIO(file_bytes), outputencoding="utf-8").convert(tmp_path)  # pyright: ignore[reportAny, reportOptionalCall]
+                file.seek(0)
+                Xlsx2csv(file, outputencoding="utf-8").convert(tmp_path)  # pyright: ignore[reportAny, reportOptionalCall]
 
-            with open(tmp_path, "r", encoding="utf-8", newline="") as f:
-                rows = list(csv.reader(f))
-            if not rows:
-                raise RuntimeError("文件内容为空或无法转换。")
-            header, *body = rows
-            header_seq = [str(h) for h in header]
-            return cast(pd.DataFrame, pd.DataFrame(body, columns=header_seq))
+            # 与逐行读取时一致：全部按字符串读取，空单元格保留为空字符串
+            return cast(
+                pd.DataFrame,
+                pd.read_csv(tmp_path, dtype=str, keep_default_na=False, encoding="utf-8", engine=CSV_ENGINE),
+            )
 
 
 
@@ -124,7 +139,8 @@ def read_excel_with_fallback(file_bytes: bytes) -> pd.DataFrame | None:  # pyrig
         except Exception:
             # 最后使用低级 openpyxl 兼容模式（忽略样式）
             try:
-                wb = load_workbook(io.BytesIO(file_bytes), data_only=True, read_only=True)
+                file.seek(0)
+                wb = load_workbook(file, data_only=True, read_only=True)
                 sheet = wb.active
                 if sheet is None:
                     raise RuntimeError("未找到工作表")
@@ -149,12 +165,53 @@ def read_excel_with_fallback(file_bytes: bytes) -> pd.DataFrame | None:  # pyrig
 
 
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def _records_to_df(records: list[dict[str, object]]) -> pd.DataFrame:
+    """规则表 records 转 DataFrame；按内容缓存，仅在活动或规则变化时重建。"""
+    return pd.DataFrame(records)
+
+
+
+def _frame_cache_key(df: pd.DataFrame) -> str:
+    """上传数据的内容哈希（含列名），用作计算缓存的键。"""
+    row_hash = int(pd.util.hash_pandas_object(df, index=True).sum())
+    return f"{row_hash}:{json.dumps([str(c) for c in df.columns], ensure_ascii=False)}"
+
+
+def _rule_cache_key(rule: dict[str, object]) -> str:
+    """规则配置的稳定序列化，用作计算缓存的键（DataFrame 以 records 形式参与）。"""
+    return json.dumps(
+        rule,
+        ensure_ascii=False,
+        sort_keys=True,
+        default=lambda o: df_to_records(o) if isinstance(o, pd.DataFrame) else str(o),
+    )
+
+
+# 每个条目是一份完整结果表，且每次编辑规则都会产生新键，只保留最近几份
+@st.cache_data(show_spinner="计算中...", max_entries=8)
+def _cached_compute(df_key: str, rule_key: str, _df: pd.DataFrame, _rule: dict[str, object]) -> pd.DataFrame:
+    """按数据与规则的键缓存计算结果；下划线参数不参与哈希，仅用于实际计算。"""
+    return cast(pd.DataFrame, compute_rewards(_df, _rule))
+
+
+
+@st.cache_data(show_spinner=False)
+def _load_sample_data_cached() -> pd.DataFrame:
+    """示例数据运行期间不会变化，重复点击“使用示例数据”时直接复用。"""
+    return cast(pd.DataFrame, load_sample_data())
+
+
+
 def read_uploaded_file(file: io.BytesIO, name: str) -> pd.DataFrame | None:
     suffix = name.lower()
     if suffix.endswith(":memory:"):
         suffix = suffix[:-8]
     if suffix.endswith(".xlsx") or suffix.endswith(".xls"):
-        return read_excel_with_fallback(file.read())
+        return read_excel_with_fallback(file)
+    file.seek(0)
+    # 用户上传的 CSV 固定用 C 引擎：pyarrow 引擎不会把重复表头改名为“备注.1”，
+    # 遇到列数不齐的行会报错，还会把日期/时间单元格解析成 date/time 对象
     return cast(pd.DataFrame, pd.read_csv(file))
 
 
@@ -208,12 +265,17 @@ def main() -> None:
         st.stop()
 
     # 活动下拉选择（含状态色标）
-    option_labels = [
-        f"{STATUS_BADGE.get(a.get('status',''), '⚪️')} {a['name']}｜{a.get('period','未设期数')}"
-        for a in activities
-    ]
-    option_map = {label: act["id"] for label, act in zip(option_labels, activities)}
-    current_label = next((lbl for lbl, aid in option_map.items() if aid == st.session_state.current_activity_id), option_labels[0])
+    badge_get = STATUS_BADGE.get
+    option_labels: list[str] = []
+    option_map: dict[str, str] = {}
+    id_to_label: dict[str, str] = {}
+    for a in activities:
+        lbl = f"{badge_get(a.get('status',''), '⚪️')} {a['name']}｜{a.get('period','未设期数')}"
+        option_labels.append(lbl)
+        option_map[lbl] = a["id"]
+        # 同一 id 取第一个标签
+        id_to_label.setdefault(a["id"], lbl)
+    current_label = id_to_label.get(st.session_state.current_activity_id, option_labels[0])
     selected_label = st.sidebar.selectbox("选择活动", option_labels, index=option_labels.index(current_label))
     st.session_state.current_activity_id = option_map[selected_label]
 
@@ -256,7 +318,7 @@ def main() -> None:
 
     action_col1, action_col2 = st.sidebar.columns(2)
     if action_col1.button("保存活动信息"):
-        update_activity_meta(
+        meta_changed = update_activity_meta(
             current_activity["id"],
             {
                 "name": name_edit,
@@ -267,8 +329,11 @@ def main() -> None:
                 "remark": remark_edit,
             },
         )
-        st.success("活动信息已更新")
-        st.rerun()
+        if meta_changed:
+            st.success("活动信息已更新")
+            st.rerun()
+        else:
+            st.info("活动信息未变化")
 
     # 删除当前活动（两步确认弹窗式体验，同行放置）
     if "show_delete_confirm" not in st.session_state:
@@ -324,9 +389,9 @@ def main() -> None:
     base_tab, quality_tab, time_tab = st.tabs(["基础奖励", "优秀奖励", "限时奖励"])
 
     # 先初始化容器，供保存时读取
-    reward_table: pd.DataFrame = pd.DataFrame(current_rule_table)
-    quality_table: pd.DataFrame = pd.DataFrame(quality_rules_data)
-    time_table: pd.DataFrame = pd.DataFrame(time_rules_data)
+    reward_table: pd.DataFrame = _records_to_df(current_rule_table)
+    quality_table: pd.DataFrame = _records_to_df(quality_rules_data)
+    time_table: pd.DataFrame = _records_to_df(time_rules_data)
     base_mode = str(rule_cfg.get("base_mode", "档位"))
     base_params = cast(dict[str, object], rule_cfg.get("base_params", {}))
     cpm_cfg = cast(dict[str, float], base_params.get("cpm", {}))
@@ -344,7 +409,7 @@ def main() -> None:
         if base_mode == "档位":
             st.markdown("**档位配置**")
             reward_table = st.data_editor(
-                pd.DataFrame(current_rule_table),
+                reward_table,
                 num_rows="dynamic",
                 width="stretch",
                 hide_index=True,
@@ -368,7 +433,7 @@ def main() -> None:
     with quality_tab:
         st.markdown("**优秀奖励规则**")
         quality_table = st.data_editor(
-            pd.DataFrame(quality_rules_data),
+            quality_table,
             num_rows="dynamic",
             width="stretch",
             hide_index=True,
@@ -383,7 +448,7 @@ def main() -> None:
     with time_tab:
         st.markdown("**限时奖励规则**")
         time_table = st.data_editor(
-            pd.DataFrame(time_rules_data),
+            time_table,
             num_rows="dynamic",
             width="stretch",
             hide_index=True,
@@ -396,12 +461,13 @@ def main() -> None:
 
     if st.button("保存基础奖励配置"):
         # 过滤空行
-        tiers_clean = [row for row in reward_table.to_dict(orient="records") if any(str(v).strip() for v in row.values())]
+        tier_records = df_to_records(reward_table)
+        tiers_clean = [row for row in tier_records if any(str(v).strip() for v in row.values())]
         update_activity_rule(
             current_activity["id"],
-            pd.DataFrame(tiers_clean if base_mode == "档位" else reward_table),
-            quality_rules=cast(list[dict[str, object]], quality_table.to_dict(orient="records")),
-            time_rules=cast(list[dict[str, object]], time_table.to_dict(orient="records")),
+            tiers_clean if base_mode == "档位" else tier_records,
+            quality_rules=df_to_records(quality_table),
+            time_rules=df_to_records(time_table),
             base_mode=base_mode,
             base_params={"tiers": tiers_clean, "cpm": cpm_cfg, "pool": pool_cfg},
         )
@@ -425,13 +491,13 @@ def main() -> None:
         st.button("清空当前数据", disabled=True, help="后续支持")
 
     if uploaded:
-        df_uploaded = read_uploaded_file(io.BytesIO(uploaded.read()), uploaded.name)
+        df_uploaded = read_uploaded_file(uploaded, uploaded.name)
         if df_uploaded is None:
             return
         df: pd.DataFrame = df_uploaded
         st.success(f"已加载文件：{uploaded.name}")
     elif use_sample:
-        df = cast(pd.DataFrame, load_sample_data())
+        df = _load_sample_data_cached()
         st.info("已加载示例数据（reward_system/data/sample_data.csv）。")
     else:
         st.info("请在左侧上传文件，或点击“使用示例数据”。")
@@ -440,18 +506,21 @@ def main() -> None:
 
     st.info(f"当前数据：{len(df)} 行，{len(df.columns)} 列。预览显示前 200 行（如有）。")
     with st.expander("查看原始数据", expanded=False):
-        st.dataframe(df.head(200), use_container_width=True, height=360)
+        st.dataframe(df.iloc[:200], use_container_width=True, height=360)
 
+    tier_records = df_to_records(reward_table)
     rule_config_payload = {
-        "table": reward_table,
-        "quality_rules": quality_table.to_dict(orient="records"),
-        "time_rules": time_table.to_dict(orient="records"),
+        "table": tier_records,
+        "quality_rules": df_to_records(quality_table),
+        "time_rules": df_to_records(time_table),
         "base_mode": base_mode,
-        "base_params": {"tiers": reward_table.to_dict(orient="records"), "cpm": cpm_cfg, "pool": pool_cfg},
+        "base_params": {"tiers": tier_records, "cpm": cpm_cfg, "pool": pool_cfg},
     }
 
     try:
-        result_df = cast(pd.DataFrame, compute_rewards(df, rule_config_payload))
+        result_df = _cached_compute(
+            _frame_cache_key(df), _rule_cache_key(rule_config_payload), df, rule_config_payload
+        )
 
 
     except Exception as exc:  # noqa: BLE001
@@ -479,10 +548,10 @@ def main() -> None:
     st.dataframe(result_df, use_container_width=True, height=560)
 
     st.subheader("下载结果")
-    buffer = build_download_buffer(result_df)
+    # 传入可调用对象，仅在用户点击下载时才生成 Excel
     st.download_button(
         label="下载处理后的 Excel",
-        data=buffer,
+        data=partial(build_download_buffer, result_df),
         file_name=f"{current_activity.get('name','activity')}_结算结果.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
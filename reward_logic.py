@@ -1,9 +1,29 @@
 import io
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import cast
+from typing import TypedDict, cast
 
+import numpy as np
 import pandas as pd  # type: ignore[reportMissingTypeStubs]
 
+try:
+    import pyarrow  # noqa: F401  # pyright: ignore[reportUnusedImport]
+
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover
+    HAS_PYARROW = False  # pyright: ignore[reportConstantRedefinition]
+
+# pyarrow 引擎为多线程 C++ 解析；未安装时使用 pandas 默认的 C 引擎
+CSV_ENGINE = "pyarrow" if HAS_PYARROW else "c"
+
+try:
+    import xlsxwriter  # noqa: F401  # pyright: ignore[reportUnusedImport, reportMissingImports]
+
+    HAS_XLSXWRITER = True
+except ImportError:  # pragma: no cover
+    HAS_XLSXWRITER = False  # pyright: ignore[reportConstantRedefinition]
+
 
 
 
@@ -103,16 +123,31 @@ COLUMN_ALIASES = {
     "是否热门": "B站热门",
 }
 
+# 列名别名查找表：键预先去空格，align_columns 只需一次 dict.get
+_ALIAS_LOOKUP: dict[str, str] = {k.strip(): v for k, v in COLUMN_ALIASES.items()}
+
 EXCLUDE_KEYWORDS = ["bug", "建议", "拉踩"]
 
+# 渠道归一化规则（按顺序匹配，作用于去空格、转小写后的文本），与 normalize_channel 保持一致
+CHANNEL_PATTERNS: list[tuple[str, str]] = [
+    ("抖音/视频号", "抖音|douyin|视频号|wechat video|wx视频号"),
+    ("小红书", "小红书|xhs|^red$"),
+    ("B站", "b站|bilibili|哔哩"),
+]
+
 
 DATA_DIR = Path(__file__).resolve().parent / "data"
 SAMPLE_DATA_PATH = DATA_DIR / "sample_data.csv"
 
 
+@lru_cache(maxsize=1)
+def _read_sample_data() -> pd.DataFrame:  # pyright: ignore[reportUnknownParameterType, reportUnknownMemberType]
+    return cast(pd.DataFrame, pd.read_csv(SAMPLE_DATA_PATH, engine=CSV_ENGINE))
+
+
 def load_sample_data() -> pd.DataFrame:  # pyright: ignore[reportUnknownParameterType, reportUnknownMemberType]
-    """读取示例数据（用于无上传时的体验）。"""
-    return cast(pd.DataFrame, pd.read_csv(SAMPLE_DATA_PATH))
+    """读取示例数据（用于无上传时的体验）。示例文件只解析一次，每次返回副本，调用方可放心修改。"""
+    return _read_sample_data().copy()
 
 
 
@@ -132,19 +167,69 @@ def normalize_channel(raw: object) -> str:
     return raw.strip()
 
 
+def normalize_channel_series(channels: pd.Series) -> pd.Series:
+    """normalize_channel 的向量化版本：整列做字符串匹配，结果与逐行调用一致。"""
+    try:
+        stripped = channels.str.strip()
+    except AttributeError:
+        # 整列都不是字符串
+        return pd.Series("", index=channels.index, dtype=object)
+    lowered = stripped.str.lower()
+    conditions = [lowered.str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool) for _, pattern in CHANNEL_PATTERNS]
+    choices = [name for name, _ in CHANNEL_PATTERNS]
+    # 非字符串元素经 .str 后为缺失值，按原逻辑归为空字符串
+    default = stripped.to_numpy(dtype=object, na_value="")
+    return pd.Series(np.select(conditions, choices, default=default), index=channels.index, dtype=object)
+
+
+@lru_cache(maxsize=32)
+def _aligned_names(columns: tuple[object, ...]) -> tuple[str, ...]:
+    """按列名元组缓存别名映射结果，同一表头重复上传时不再逐列处理。"""
+    keys = (str(col).strip() for col in columns)
+    return tuple(_ALIAS_LOOKUP.get(key, key) for key in keys)
+
+
 def align_columns(df: pd.DataFrame) -> pd.DataFrame:
-    mapping: dict[str, str] = {}
-    for col in df.columns:
-        key = str(col).strip()
-        target = COLUMN_ALIASES.get(key, key)
-        mapping[col] = target
-    return df.rename(columns=mapping)
+    return df.set_axis(list(_aligned_names(tuple(df.columns))), axis=1)
 
 
 def to_numeric(series: pd.Series) -> pd.Series:
     return pd.to_numeric(series, errors="coerce").fillna(0)
 
 
+def to_text(series: pd.Series) -> pd.Series:
+    """逐元素 str()，与逐行处理时 str(row[col]) 的结果一致（缺失值同样转为 "nan" 等文本）。
+
+    不经过 numpy 的定长 unicode 数组：其大小为 行数 × 最长单元格，单个超长单元格即可撑爆内存。
+    """
+    return pd.Series([str(v) for v in series.to_numpy(dtype=object)], index=series.index, dtype=object)
+
+
+# 仅做子串/正则扫描的文本列：安装 pyarrow 时存为 Arrow 连续缓冲区，str.contains/str.lower 走 C++ 内核
+_SCAN_TEXT_DTYPE = "string[pyarrow]" if HAS_PYARROW else object
+
+
+def to_scan_text(series: pd.Series) -> pd.Series:
+    """取值与 to_text 相同（不含缺失值），供关键词扫描使用；结果不会写入输出列。"""
+    return pd.Series([str(v) for v in series.to_numpy(dtype=object)], index=series.index, dtype=_SCAN_TEXT_DTYPE)
+
+
+def df_to_records(df: pd.DataFrame) -> list[dict[str, object]]:
+    """等价于 df.to_dict(orient="records")，按列整体 tolist 后再拼行，避免逐格装箱。"""
+    columns = list(df.columns)
+    if not columns:
+        return [{} for _ in range(len(df))]
+    values: list[list[object]] = []
+    for _, series in df.items():
+        col = series.tolist()
+        # 可空扩展类型的缺失值与 to_dict 保持一致，输出 None 而非 pd.NA
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and series.hasnans:
+            col = [None if v is pd.NA else v for v in col]
+        values.append(col)
+    dict_ = dict
+    return [dict_(zip(columns, row)) for row in zip(*values)]
+
+
 def pick_base_reward(channel: str, plays: float, reward_table: pd.DataFrame) -> float:
     if not channel:
         return 0
@@ -156,35 +241,208 @@ def pick_base_reward(channel: str, plays: float, reward_table: pd.DataFrame) ->
     return 0.0
 
 
-def detect_exclusion(row: pd.Series, text_columns: list[str]) -> str | None:
-    haystack = " ".join(str(row.get(col, "")) for col in text_columns).lower()
-    for kw in EXCLUDE_KEYWORDS:
-        if kw.lower() in haystack:
-            return f"含排除关键词:{kw}"
-    return None
+def tier_base_rewards(channels: pd.Series, plays: np.ndarray, reward_table: pd.DataFrame) -> np.ndarray:
+    """pick_base_reward 的向量化版本：档位表只排序一次，用 searchsorted 为整列定位档位。
+
+    channels 需已归一化；未命中任何档位、渠道为空或档位表无该渠道列时奖励为 0。
+    """
+    result = np.zeros(len(channels), dtype=float)
+    thresholds = pd.to_numeric(reward_table["阈值"], errors="coerce").to_numpy(dtype=float)
+    # 阈值缺失的档位永远不会命中；降序稳定排序，阈值相同时保持表内先后
+    valid_pos = np.flatnonzero(~np.isnan(thresholds))
+    desc_pos = valid_pos[np.argsort(-thresholds[valid_pos], kind="stable")]
+    if desc_pos.size == 0:
+        return result
+    ascending = thresholds[desc_pos][::-1]
+    # 不超过播放量的档位个数；降序表中第一个满足 plays >= 阈值 的档位即 n - count
+    count = np.searchsorted(ascending, plays, side="right")
+    tier_idx = desc_pos.size - count
+    matched = count > 0
+    chan_values = channels.to_numpy(dtype=object)
+    for chan in pd.unique(chan_values):
+        if not chan or chan not in reward_table.columns:
+            continue
+        payouts = np.array([float(v or 0) for v in reward_table[chan].to_numpy(dtype=object)[desc_pos]], dtype=float)
+        mask = matched & (chan_values == chan)
+        result[mask] = payouts[tier_idx[mask]]
+    return result
+
+
+class QualityRuleArrays(TypedDict):
+    """优质加成规则的列式表示：第 i 条规则的各字段分别位于各数组/列表的第 i 位。"""
+
+    fields: list[str]
+    thresholds: np.ndarray
+    adds: np.ndarray
+    only_short: np.ndarray
+    channels: list[str]
+
+
+class TimeRuleArrays(TypedDict):
+    """限时奖励规则的列式表示；patterns 为关键词合成的正则，无关键词时为 None。"""
+
+    min_plays: np.ndarray
+    adds: np.ndarray
+    patterns: list[re.Pattern[str] | None]
+
+
+def quality_rule_arrays(quality_rules: list[dict[str, object]]) -> QualityRuleArrays:
+    """将优质加成规则列表一次性转换为类型化数组，计算时不再逐条 .get/float。"""
+    return {
+        "fields": [str(r.get("字段", "")) for r in quality_rules],
+        "thresholds": np.array([float(cast(float, r.get("阈值", 0))) for r in quality_rules], dtype=float),
+        "adds": np.array([float(cast(float, r.get("加成", 0))) for r in quality_rules], dtype=float),
+        "only_short": np.array([bool(r.get("仅短视频", False)) for r in quality_rules], dtype=bool),
+        "channels": [str(r.get("适用渠道", "全部")) for r in quality_rules],
+    }
+
+
+def time_rule_arrays(time_rules: list[dict[str, object]]) -> TimeRuleArrays:
+    """将限时奖励规则列表一次性转换为类型化数组，关键词预先编译为正则。"""
+    patterns: list[re.Pattern[str] | None] = []
+    for rule_item in time_rules:
+        kw_list = rule_item.get("关键词") or []
+        kw_list = cast(list[object], kw_list) if isinstance(kw_list, list) else [kw_list]
+        patterns.append(re.compile("|".join(re.escape(str(kw)) for kw in kw_list)) if kw_list else None)
+    return {
+        "min_plays": np.array([float(cast(float, r.get("播放下限", 0))) for r in time_rules], dtype=float),
+        "adds": np.array([float(cast(float, r.get("加成", 0))) for r in time_rules], dtype=float),
+        "patterns": patterns,
+    }
+
+
+def quality_bonuses(work: pd.DataFrame, rules: QualityRuleArrays, type_text: pd.Series) -> np.ndarray:
+    """优质加成的向量化计算：规则逐条遍历，每条规则对整列求命中掩码后累加。type_text 为作品类型的扫描文本。"""
+    bonus = np.zeros(len(work), dtype=float)
+    channels = work["渠道"]
+    is_short = (
+        type_text.str.contains("短视频", regex=False).to_numpy(dtype=bool)
+        | channels.isin(["抖音/视频号", "小红书"]).to_numpy(dtype=bool)
+    )
+    # 同一字段被多条规则引用时只转换一次
+    field_values: dict[str, np.ndarray] = {}
+    for i, field in enumerate(rules["fields"]):
+        eligible = np.ones(len(work), dtype=bool)
+        if rules["only_short"][i]:
+            eligible &= is_short
+        target_channel = rules["channels"][i]
+        if target_channel != "全部":
+            eligible &= (channels == target_channel).to_numpy(dtype=bool)
+        values = field_values.get(field)
+        if values is None:
+            if field in work.columns:
+                raw = work[field].to_numpy(dtype=object)
+                values = pd.to_numeric(work[field], errors="coerce").to_numpy(dtype=float, copy=True)
+                # 与 float(v or 0) 一致：None/空字符串按 0 计，NaN 保持不命中
+                values[(raw == None) | (raw == "")] = 0.0  # noqa: E711
+            else:
+                values = np.zeros(len(work), dtype=float)
+            field_values[field] = values
+        bonus[eligible & (values >= rules["thresholds"][i])] += rules["adds"][i]
+    return bonus
+
+
+def time_bonuses(work: pd.DataFrame, rules: TimeRuleArrays, type_text: pd.Series) -> np.ndarray:
+    """限时奖励的向量化计算：每条规则的关键词合成一个正则，对作品类型扫描文本整列匹配一次。"""
+    bonus = np.zeros(len(work), dtype=float)
+    plays = work["播放量"].to_numpy(dtype=float)
+    for min_plays, add, pattern in zip(rules["min_plays"], rules["adds"], rules["patterns"]):
+        # 写成“不低于下限”的取反，播放下限为 NaN 时与原逻辑一样不拦截
+        hit = ~(plays < min_plays)
+        if pattern is not None:
+            hit &= type_text.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        bonus[hit] += add
+    return bonus
+
+
+def detect_exclusions(work: pd.DataFrame, text_columns: list[str], type_text: pd.Series) -> pd.Series:
+    """排除关键词检测：文本列整列以空格拼接、转小写后逐个关键词查找，命中多个时取列表中靠前的关键词。
+
+    type_text 为已转换好的作品类型扫描文本，直接复用。
+    """
+    haystack = pd.Series("", index=work.index, dtype=_SCAN_TEXT_DTYPE)
+    for i, col in enumerate(text_columns):
+        text = type_text if col == "作品类型" else to_scan_text(work[col])
+        haystack = haystack + (" " if i else "") + text
+    haystack = haystack.str.lower()
+    reasons = np.full(len(work), None, dtype=object)
+    for kw in reversed(EXCLUDE_KEYWORDS):
+        hit = haystack.str.contains(kw.lower(), regex=False).to_numpy(dtype=bool)
+        reasons[hit] = f"含排除关键词:{kw}"
+    return pd.Series(reasons, index=work.index, dtype=object)
+
+
+# bool_from_any 认定为真的文案，模块加载时构建一次
+_TRUE_TOKENS = frozenset({"1", "true", "yes", "y", "是", "有", "热搜", "热门"})
 
 
 def bool_from_any(value: object) -> bool:
-    if isinstance(value, bool):
+    if value is True or value is False:
         return value
     if value is None:
         return False
     if isinstance(value, (int, float)):
         return value != 0
-    text = str(value).strip().lower()
-    return text in {"1", "true", "yes", "y", "是", "有", "热搜", "热门"}
+    return str(value).strip().lower() in _TRUE_TOKENS
+
+
+def bool_series(values: pd.Series) -> np.ndarray:
+    """bool_from_any 的向量化版本：只对去重后的取值调用 bool_from_any，再按编码回填整列。"""
+    obj = values.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(obj)
+    flags = np.array([bool_from_any(v) for v in uniques], dtype=bool)
+    result = np.zeros(len(obj), dtype=bool)
+    present = codes >= 0
+    result[present] = flags[codes[present]]
+    missing = ~present
+    if missing.any() and getattr(values.dtype, "na_value", np.nan) is not pd.NA:
+        # 缺失值与 bool_from_any 一致：None 为假，NaN 按数值处理（nan != 0 为真）；pd.NA 类缺失为假
+        result[missing] = obj[missing] != None  # noqa: E711
+    return result
+
+
+def bilibili_bonuses(work: pd.DataFrame, type_text: pd.Series) -> np.ndarray:
+    """B站平台加成的向量化计算：热门 +200、热搜 +100（取其高，支持布尔列或作品类型文案）。"""
+    n = len(work)
+
+    def flag(col: str) -> np.ndarray:
+        # 多个别名（如 是否热搜 与 B站热搜）可能对齐成同名的重复列，逐列判断后取或
+        result = np.zeros(n, dtype=bool)
+        for pos in np.flatnonzero(work.columns == col):
+            result |= bool_series(work.iloc[:, pos])
+        return result
+
+    # “热搜”/“热门”列已在 align_columns 中归并为 B站热搜/B站热门，这里只需判断这两列
+    hot = type_text.str.contains("热门", regex=False).to_numpy(dtype=bool) | flag("B站热门")
+    top = type_text.str.contains("热搜", regex=False).to_numpy(dtype=bool) | flag("B站热搜")
+    is_bili = (work["渠道"] == "B站").to_numpy(dtype=bool)
+    return np.where(is_bili, np.where(hot, 200, np.where(top, 100, 0)), 0)
+
 
 
-def coalesce_row(row: pd.Series, cols: list[str]) -> str:
-    for col in cols:
-        if col in row and pd.notna(row[col]) and str(row[col]).strip() != "":
-            return str(row[col]).strip()
-    return ""
 
+def coalesce_columns(df: pd.DataFrame, cols: list[str], default: str) -> pd.Series:
+    """按列优先级整列合并：取第一个非空且去空格后非空白的文本，都没有时取 default。"""
+    result = np.full(len(df), default, dtype=object)
+    # 倒序覆盖，优先级高的列最后写入
+    for col in reversed(cols):
+        if col not in df.columns:
+            continue
+        text = to_text(df[col]).str.strip()
+        valid = df[col].notna().to_numpy(dtype=bool) & (text != "").to_numpy(dtype=bool)
+        result[valid] = text.to_numpy(dtype=object)[valid]
+    return pd.Series(result, index=df.index, dtype=object)
 
 
 
-def _extract_rule_config(rule: object) -> tuple[pd.DataFrame, list[dict[str, object]], list[dict[str, object]], str, dict[str, object]]:
+
+def _extract_rule_config(rule: object) -> tuple[pd.DataFrame, QualityRuleArrays, TimeRuleArrays, str, dict[str, object]]:
+    """解析规则配置；优质/限时规则在此一次性转换为列式数组。"""
+    base_table, quality_rules, time_rules, base_mode, base_params = _extract_rule_lists(rule)
+    return base_table, quality_rule_arrays(quality_rules), time_rule_arrays(time_rules), base_mode, base_params
+
+
+def _extract_rule_lists(rule: object) -> tuple[pd.DataFrame, list[dict[str, object]], list[dict[str, object]], str, dict[str, object]]:
     if isinstance(rule, pd.DataFrame):
         return rule, DEFAULT_QUALITY_RULES, DEFAULT_TIME_RULES, DEFAULT_BASE_MODE, DEFAULT_BASE_PARAMS
     if isinstance(rule, dict):
@@ -205,7 +463,8 @@ def _extract_rule_config(rule: object) -> tuple[pd.DataFrame, list[dict[str, obj
 
 def compute_rewards(df: pd.DataFrame, rule: object) -> pd.DataFrame:
     base_table, quality_rules, time_rules, base_mode, base_params = _extract_rule_config(rule)
-    work = align_columns(df.copy())
+    # align_columns 返回新的 DataFrame，后续都是整列重新赋值，不会改动调用方传入的 df，无需整表复制
+    work = align_columns(df)
 
 
 
@@ -217,7 +476,10 @@ def compute_rewards(df: pd.DataFrame, rule: object) -> pd.DataFrame:
     if not has_identity:
         raise ValueError("缺少账号标识（账号ID/账号名称/账号昵称 至少一列）")
 
-    work["渠道"] = work["渠道"].apply(normalize_channel)
+    # 作品类型的扫描文本只转换一次，排除检测与各项加成共用
+    type_text = to_scan_text(work["作品类型"])
+
+    work["渠道"] = normalize_channel_series(work["渠道"])
 
 
     work["播放量"] = to_numeric(work["播放量"])
@@ -235,142 +497,89 @@ def compute_rewards(df: pd.DataFrame, rule: object) -> pd.DataFrame:
         work["期数"] = "默认"
     work["期数"] = work["期数"].fillna("默认").astype(str)
 
-    # 账号标识：优先 账号ID，其次账号名称，再次账号昵称
-    def pick_identity(row: pd.Series) -> str:
-        ident = coalesce_row(row, ["账号ID", "账号名称", "账号昵称"])
-        return ident or "未知账号"
+    # 低基数列转为 category，后续比较、掩码与排序走整数编码
+    for col in ("渠道", "作品类型", "期数"):
+        if col in work.columns:
+            work[col] = work[col].astype("category")
 
-    work["账号标识"] = work.apply(pick_identity, axis=1)
+    # 账号标识：优先 账号ID，其次账号名称，再次账号昵称
+    work["账号标识"] = coalesce_columns(work, ["账号ID", "账号名称", "账号昵称"], "未知账号")
 
     text_columns = [c for c in REQUIRED_BASE_COLUMNS + OPTIONAL_TEXT_COLUMNS if c in work.columns]
-    work["排除原因"] = work.apply(lambda r: detect_exclusion(r, text_columns), axis=1)
+    work["排除原因"] = detect_exclusions(work, text_columns, type_text)
 
     # 基础奖励三种模式
-    def calc_base_reward(r: pd.Series) -> float:
-        mode = base_mode or DEFAULT_BASE_MODE
-        if mode == "CPM":
-            cpm_cfg = cast(dict[str, object], base_params.get("cpm", {}))
-            rate = float(cpm_cfg.get(r.get("渠道", ""), cpm_cfg.get("默认", 0)))
-            plays = float(r.get("播放量", 0))
-            return plays / 1000.0 * rate
-        if mode == "瓜分":
-            pool_cfg = cast(dict[str, object], base_params.get("pool", {}))
-            pool_total = float(pool_cfg.get("total", 0))
-            min_play = float(pool_cfg.get("min_play", 0))
-            if plays_sum_ref[0] == 0:  # 预先计算后设置
-                return 0.0
-            if float(r.get("播放量", 0)) < min_play:
-                return 0.0
-            return pool_total * float(r.get("播放量", 0)) / plays_sum_ref[0]
-        # 默认档位模式
-        return pick_base_reward(r["渠道"], r["播放量"], base_table)
-
-    # 若为瓜分模式，先计算符合门槛的播放总和
-    plays_sum_ref = [0.0]
-    if base_mode == "瓜分":
+    mode = base_mode or DEFAULT_BASE_MODE
+    plays = work["播放量"].to_numpy(dtype=float)
+    if mode == "CPM":
+        cpm_cfg = cast(dict[str, object], base_params.get("cpm", {}))
+        default_rate = cpm_cfg.get("默认", 0)
+        # 费率按渠道取值（未配置的渠道用“默认”），每个渠道只解析一次
+        rate_by_chan = {chan: float(cpm_cfg.get(chan, default_rate)) for chan in pd.unique(work["渠道"].to_numpy(dtype=object))}
+        rates = work["渠道"].map(rate_by_chan).to_numpy(dtype=float)
+        work["基础奖励"] = plays / 1000.0 * rates
+    elif mode == "瓜分":
         pool_cfg = cast(dict[str, object], base_params.get("pool", {}))
+        pool_total = float(pool_cfg.get("total", 0))
         min_play = float(pool_cfg.get("min_play", 0))
-        qualifies = work["播放量"] >= min_play
-        plays_sum_ref[0] = float(work.loc[qualifies, "播放量"].sum())
-
-    work["基础奖励"] = work.apply(calc_base_reward, axis=1)
+        # 先计算符合门槛的播放总和，再按播放占比瓜分奖金池
+        plays_sum = float(plays[plays >= min_play].sum())
+        if plays_sum == 0:
+            work["基础奖励"] = 0.0
+        else:
+            work["基础奖励"] = np.where(plays < min_play, 0.0, pool_total * plays / plays_sum)
+    else:
+        # 默认档位模式
+        work["基础奖励"] = tier_base_rewards(work["渠道"], plays, base_table)
 
     # 限时奖励：配置化规则，可累加
-    def calc_time_bonus(r: pd.Series) -> float:
-        bonus_total = 0.0
-        text = str(r.get("作品类型", ""))
-        plays = float(r.get("播放量", 0))
-        for rule_item in time_rules:
-            min_plays = float(rule_item.get("播放下限", 0))
-            kw_list = rule_item.get("关键词") or []
-            kw_list = kw_list if isinstance(kw_list, list) else [kw_list]
-            add = float(rule_item.get("加成", 0))
-            if plays < min_plays:
-                continue
-            if kw_list and not any(str(kw) in text for kw in kw_list):
-                continue
-            bonus_total += add
-        return bonus_total
-
-    work["限时奖励"] = work.apply(calc_time_bonus, axis=1)
-
-
-    def bilibili_extra(r: pd.Series) -> int:
-
-        if r["渠道"] != "B站":
-            return 0
-        text = str(r.get("作品类型", ""))
-        hot_flag = bool_from_any(r.get("B站热门")) or bool_from_any(r.get("热门"))
-        top_flag = bool_from_any(r.get("B站热搜")) or bool_from_any(r.get("热搜"))
-        extra_list: list[int] = []
-        if "热搜" in text:
-            extra_list.append(100)
-        if "热门" in text:
-            extra_list.append(200)
-        if top_flag:
-            extra_list.append(100)
-        if hot_flag:
-            extra_list.append(200)
-        return max(extra_list) if extra_list else 0
-
-    work["平台加成"] = work.apply(bilibili_extra, axis=1)
-
-    def quality_extra(r: pd.Series) -> float:
-        bonus = 0.0
-        type_str = str(r.get("作品类型", ""))
-        is_short = "短视频" in type_str or r.get("渠道") in ["抖音/视频号", "小红书"]
-        for rule_item in quality_rules:
-            field = str(rule_item.get("字段", ""))
-            threshold = float(rule_item.get("阈值", 0))
-            add = float(rule_item.get("加成", 0))
-            only_short = bool(rule_item.get("仅短视频", False))
-            target_channel = str(rule_item.get("适用渠道", "全部"))
-            if only_short and not is_short:
-                continue
-            if target_channel != "全部" and r.get("渠道") != target_channel:
-                continue
-            value = float(r.get(field, 0) or 0)
-            if value >= threshold:
-                bonus += add
-        return bonus
-
-    work["优质加成"] = work.apply(quality_extra, axis=1)
-
-    work["总奖励"] = work[["基础奖励", "限时奖励", "平台加成", "优质加成"]].sum(axis=1)
+    work["限时奖励"] = time_bonuses(work, time_rules, type_text)
 
-    work["超额标记"] = ""
 
-    # 作品标识：账号名称 + 视频标题（若缺则退化为账号标识 + 任意标题列）
+    work["平台加成"] = bilibili_bonuses(work, type_text)
 
-    def pick_title(row: pd.Series) -> str:
-        for col in ["视频标题", "作品标题", "标题"]:
-            if col in row and pd.notna(row[col]) and str(row[col]).strip() != "":
-                return str(row[col]).strip()
-        return "未命名作品"
+    work["优质加成"] = quality_bonuses(work, quality_rules, type_text)
 
-    work["作品标识"] = work.apply(
-        lambda r: f"{r.get('账号名称', r.get('账号标识', '未知账号'))}｜{pick_title(r)}",
-        axis=1,
-    )
+    work["超额标记"] = ""
 
+    # 作品标识：账号名称 + 视频标题（若缺则退化为账号标识 + 任意标题列）
 
+    owner = to_text(work["账号名称"]) if "账号名称" in work.columns else work["账号标识"]
+    title = coalesce_columns(work, ["视频标题", "作品标题", "标题"], "未命名作品")
+    work["作品标识"] = owner + "｜" + title
 
-    # 重新计算总奖励（基础/限时/平台加成不受封顶影响）
-    work["总奖励"] = work[["基础奖励", "限时奖励", "平台加成", "优质加成"]].sum(axis=1)
 
-    excluded_mask = work["排除原因"].notna()
-    work.loc[excluded_mask, "总奖励"] = 0
 
-    work = work.sort_values(["期数", "账号标识", "作品标识", "总奖励"], ascending=[True, True, True, False]).reset_index(drop=True)
+    # 总奖励（基础/限时/平台加成不受封顶影响），排除的记录记 0
+    excluded_mask = work["排除原因"].notna().to_numpy(dtype=bool)
+    total = work[["基础奖励", "限时奖励", "平台加成", "优质加成"]].sum(axis=1).to_numpy(dtype=float, copy=True)
+    total[excluded_mask] = 0
+    work["总奖励"] = total
 
+    # 按 期数/账号标识/作品标识 升序、总奖励降序排列：文本键先转为有序整数编码，再做一次稳定的 lexsort
+    order = np.lexsort(
+        (
+            -total,
+            pd.factorize(work["作品标识"].to_numpy(dtype=object), sort=True)[0],
+            pd.factorize(work["账号标识"].to_numpy(dtype=object), sort=True)[0],
+            work["期数"].cat.codes.to_numpy(),
+        )
+    )
+    work = work.iloc[order].reset_index(drop=True)
 
-    work["状态"] = work.apply(
-        lambda r: r["排除原因"]
-        if pd.notna(r["排除原因"])
-        else (r["超额标记"] if r["超额标记"] else "计入"),
-        axis=1,
+
+    over_mark = work["超额标记"].to_numpy(dtype=object)
+    work["状态"] = np.where(
+        work["排除原因"].notna().to_numpy(dtype=bool),
+        work["排除原因"].to_numpy(dtype=object),
+        np.where(over_mark.astype(bool), over_mark, "计入"),
     )
 
+    # category 只用于内部比较与排序，返回给界面和导出的仍是普通文本列
+    for col in ("渠道", "作品类型", "期数"):
+        if col in work.columns:
+            work[col] = work[col].astype(object)
+
     display_cols = [
         "期数",
         "渠道",
@@ -399,6 +608,12 @@ def compute_rewards(df: pd.DataFrame, rule: object) -> pd.DataFrame:
 
 def build_download_buffer(result_df: pd.DataFrame) -> bytes:
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+    if HAS_XLSXWRITER:
+        # xlsxwriter 直接流式生成 XML，不像 openpyxl 那样为每个单元格构建对象树。
+        # 不开 constant_memory：to_excel 按列写出单元格，该模式只保留当前行，会丢数据
+        writer = pd.ExcelWriter(output, engine="xlsxwriter")
+    else:
+        writer = pd.ExcelWriter(output, engine="openpyxl")
+    with writer:
         result_df.to_excel(writer, index=False, sheet_name="结算结果")
     return output.getvalue()